@@ -30,20 +30,29 @@ ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
 SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
-import pygraphviz as pgv
 import json
 import sys
 import os
-import urllib.request
 import time
 import math
+import argparse
+# pygraphviz, asyncio and urllib are imported only where they are needed so that
+# planning and querying the cache starts quickly
 
 # wait 15 seconds per query to blockchain to not get banned
 min_request_delay = 15 
 last_request_time = time.time() - 14
 lookup_addr_url= "https://blockchain.info/rawaddr/"
 lookup_tx_url = "https://blockchain.info/rawtx/"
+lookup_multiaddr_url = "https://blockchain.info/multiaddr?active="
 cache_dir = "data/addresses"
+batch_size = 20        # number of uncached addresses to query together with multiaddr
+multiaddr_max_tx = 100 # maximum transactions blockchain.com will return from a single multiaddr query
+request_timeout = 60   # seconds before a stalled download is retried
+max_retries = 6        # retries for rate limited (429), server (5xx) and network errors
+retry_delay = 30       # seconds to wait after the first failure, doubled after every further failure
+work_queue_file = "pending.json" # downloads not yet completed, in cache_dir so interrupted runs resume
+cache_index_file = "index.txt"   # "addr n_tx" of every cached address, so planning does not decode any json
 
 # constants and options
 satoshi = 100000000   # 100 M satoshi per BTC
@@ -56,6 +65,12 @@ save_addresses_in_dot = True
 verbose = False
 debug_mode = False
 
+# graph summarization for very large data sets, None disables each limit
+max_edges_per_node = None # keep only the heaviest outgoing edges of each node, the rest go to an "Other" node, incoming edges are not limited
+max_cluster_nodes = None  # fold the lightest wallets of a ThirdParty cluster into its "Other" node
+max_graph_nodes = None    # limits so that graphviz can always lay out the graph, the nodes that are never folded may exceed max_graph_nodes
+max_graph_edges = None
+
 # whether to add suggestions for other addresses to be included in existing wallets
 suggest_irrelevant = False
 suggest_change = True
@@ -85,6 +100,17 @@ transactions = dict()
 wallets = dict()
 rev_wallet = dict()
 addresses = dict()
+
+# wallet registry, every node of the graph is recorded once with an integer id and a bitmap of its roles
+ROLE_OWN = 1         # fully tracked wallets, balances are accurate
+ROLE_THIRDPARTY = 2  # '@' wallets, only partially tracked
+ROLE_UNTRACKED = 4   # the From and To Not Tracked nodes
+ROLE_FOLDED = 8      # "Other" nodes that collect summarized wallets
+wallet_ids = dict()  # name => id
+wallet_names = []    # id => name
+wallet_roles = []    # id => role bitmap
+wallet_subgraphs = [] # id => name of the subgraph the node is drawn in, or None
+
 def reset_global_state():
     mergable_wallets.clear()
     inputs.clear()
@@ -94,6 +120,45 @@ def reset_global_state():
     wallets.clear()
     rev_wallet.clear()
     addresses.clear()
+    wallet_ids.clear()
+    wallet_names.clear()
+    wallet_roles.clear()
+    wallet_subgraphs.clear()
+
+def register_wallet(name, roles, subgraph = None):
+    """
+    records the roles of a node in the registry, returning its id
+    """
+    
+    if name in wallet_ids:
+        wallet_id = wallet_ids[name]
+        wallet_roles[wallet_id] |= roles
+        if subgraph is not None:
+            wallet_subgraphs[wallet_id] = subgraph
+        return wallet_id
+    wallet_id = len(wallet_names)
+    wallet_ids[name] = wallet_id
+    wallet_names.append(name)
+    wallet_roles.append(roles)
+    wallet_subgraphs.append(subgraph)
+    return wallet_id
+
+def unregister_wallet(name):
+    """
+    clears the roles of a node that is no longer in the graph, ids are never reused
+    """
+    
+    if name in wallet_ids:
+        wallet_roles[wallet_ids[name]] = 0
+        wallet_subgraphs[wallet_ids[name]] = None
+
+def get_wallet_subgraph(name):
+    wallet_id = wallet_ids.get(name)
+    return None if wallet_id is None else wallet_subgraphs[wallet_id]
+
+def has_role(name, role):
+    wallet_id = wallet_ids.get(name)
+    return wallet_id is not None and (wallet_roles[wallet_id] & role) != 0
 
 def get_tx(txid):
     if txid in transactions:
@@ -167,13 +232,376 @@ def store_addr(addr, addr_json, wallet = None):
     if by_wallet and wallet is not None:
         add_to_wallet(wallet, addr)
     
+def read_url(url):
+    import urllib.request
+    with urllib.request.urlopen(url, timeout=request_timeout) as response:
+        return response.read()
+
+def write_atomic(path, data):
+    """
+    writes data to a temporary file and renames it so path is never left truncated
+    """
+    
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+async def fetch_data(url):
+    """
+    retrieves the json response of url, waiting to respect the blockchain.com rate limit
+    and retrying with exponential backoff on rate limits, server and network errors
+    """
+    
+    import asyncio
+    import urllib.error
+    import http.client
+    global last_request_time
+    for attempt in range(max_retries + 1):
+        wait_time = time.time() - last_request_time
+        if wait_time < min_request_delay:
+            wait_time = min_request_delay - wait_time
+            print("Waiting to make next URL API request: ", wait_time)
+            await asyncio.sleep(wait_time)
+        print("Downloading ", url)
+        
+        # raise an error if we need to re-download some data to avoid getting blocked by blockchain.com while debugging
+        if debug_mode:
+            raise RuntimeError("Where did url=%s come from?" % (url))
+        
+        delay = retry_delay * 2 ** attempt
+        try:
+            data = await asyncio.to_thread(read_url, url)
+            json.loads(data) # a truncated response is not valid json
+        except urllib.error.HTTPError as e:
+            if e.code != 429 and e.code < 500:
+                raise
+            error = e
+            if e.headers is not None and str(e.headers.get('Retry-After', '')).isdigit():
+                delay = max(delay, int(e.headers['Retry-After']))
+        except http.client.InvalidURL:
+            raise
+        except (urllib.error.URLError, http.client.HTTPException, OSError, ValueError) as e:
+            error = e
+        else:
+            return data
+        finally:
+            last_request_time = time.time()
+        
+        if attempt < max_retries:
+            print("WARNING: request failed:", error, "retrying in", delay, "seconds")
+            await asyncio.sleep(delay)
+    raise RuntimeError("Could not download %s after %d retries: %s" % (url, max_retries, error))
+
+async def fetch_url(url, cache):
+    """
+    retrieves url into the cache file, which is only written once completely downloaded
+    """
+    
+    data = await fetch_data(url)
+    write_atomic(cache, data)
+
+def load_work_queue():
+    queue_file = cache_dir + "/" + work_queue_file
+    if not os.path.exists(queue_file):
+        return []
+    with open(queue_file) as fh:
+        # the cache files are saved relative to cache_dir, which may be given differently on the next run
+        return [(url, cache_dir + "/" + os.path.basename(cache)) for url, cache in json.load(fh)]
+
+def save_work_queue(queue):
+    queue_file = cache_dir + "/" + work_queue_file
+    if len(queue) == 0:
+        if os.path.exists(queue_file):
+            os.remove(queue_file)
+        return
+    write_atomic(queue_file, json.dumps([(url, os.path.basename(cache)) for url, cache in queue]).encode())
+
+async def run_work_queue(queue):
+    import urllib.error
+    while len(queue) > 0:
+        url, cache = queue[0]
+        if not os.path.exists(cache):
+            try:
+                await fetch_url(url, cache)
+            except urllib.error.HTTPError:
+                # a client error will not go away by retrying, so do not leave it at the head of the queue
+                print("WARNING: dropping", url, "from the pending downloads")
+                queue.pop(0)
+                save_work_queue(queue)
+                raise
+        queue.pop(0)
+        save_work_queue(queue)
+
+def download_all(items):
+    """
+    appends the (url, cache) items to the persistent work queue and downloads everything in it,
+    including anything left over from an interrupted run
+    """
+    
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    queue = load_work_queue()
+    for item in items:
+        if tuple(item) not in queue:
+            queue.append(tuple(item))
+    if len(queue) == 0:
+        return
+    save_work_queue(queue)
+    import asyncio
+    asyncio.run(run_work_queue(queue))
+
+def download_data(url):
+    """
+    returns the response of url without queueing or caching it
+    """
+    
+    import asyncio
+    return asyncio.run(fetch_data(url))
+
+cache_index = dict()
+def read_cache_index():
+    """
+    Returns a dict of addr => n_tx for every address recorded in the cache index
+    """
+    
+    if len(cache_index) == 0 and os.path.exists(cache_dir + "/" + cache_index_file):
+        with open(cache_dir + "/" + cache_index_file) as fh:
+            for line in fh.readlines():
+                fields = line.split()
+                # a line without a newline was torn by an interrupted write
+                if line.endswith("\n") and len(fields) == 2 and fields[1].isdigit():
+                    cache_index[fields[0]] = int(fields[1])
+    return cache_index
+
+def record_cache_index(addr, n_tx):
+    index = read_cache_index()
+    if index.get(addr) == n_tx:
+        return
+    index[addr] = n_tx
+    index_file = cache_dir + "/" + cache_index_file
+    line = "%s %d\n" % (addr, n_tx)
+    if os.path.exists(index_file) and os.path.getsize(index_file) > 0:
+        with open(index_file, "rb") as fh:
+            fh.seek(-1, os.SEEK_END)
+            if fh.read(1) != b"\n":
+                # start a new line after a torn one
+                line = "\n" + line
+    with open(index_file, "a") as fh:
+        fh.write(line)
+
+def get_addr_cache(addr, offset = 0):
+    if offset > 0:
+        return cache_dir + "/%s-%d.json" % (addr, offset)
+    return cache_dir + "/%s.json" % (addr)
+
+def split_multiaddr(multi_json):
+    """
+    Takes a multiaddr json response and returns a dict of addr => rawaddr-like json
+    for every address whose transactions were all included in the response
+    """
+    
+    addr_txs = dict()
+    for a in multi_json['addresses']:
+        addr_txs[a['address']] = []
+    for tx in multi_json['txs']:
+        touched = dict()
+        for input in tx['inputs']:
+            if 'prev_out' in input and 'addr' in input['prev_out']:
+                touched[input['prev_out']['addr']] = True
+        for output in tx['out']:
+            if 'addr' in output:
+                touched[output['addr']] = True
+        for addr in touched.keys():
+            if addr in addr_txs:
+                addr_txs[addr].append(tx)
+    
+    complete = dict()
+    for a in multi_json['addresses']:
+        addr = a['address']
+        if a['n_tx'] != len(addr_txs[addr]):
+            # some transactions were truncated, leave it for rawaddr
+            continue
+        addr_json = dict()
+        for key in ('address', 'n_tx', 'total_received', 'total_sent', 'final_balance'):
+            if key in a:
+                addr_json[key] = a[key]
+        addr_json['txs'] = addr_txs[addr]
+        complete[addr] = addr_json
+    return complete
+
+def query_multiaddr(batch):
+    """
+    downloads a single multiaddr query, stores every complete low activity address in the cache
+    and returns a dict of addr => n_tx for the addresses that were truncated
+    """
+    
+    url = lookup_multiaddr_url + "|".join(batch) + "&n=%d" % (multiaddr_max_tx)
+    multi_json = json.loads(download_data(url))
+    
+    complete = split_multiaddr(multi_json)
+    for addr, addr_json in complete.items():
+        if addr_json['n_tx'] > 50:
+            # rawaddr pages are 50 transactions so keep the cache layout consistent
+            continue
+        write_atomic(get_addr_cache(addr), json.dumps(addr_json).encode())
+        record_cache_index(addr, addr_json['n_tx'])
+    print("Batched", len(batch), "addresses,", len(complete), "were complete")
+    
+    truncated = dict()
+    for a in multi_json['addresses']:
+        if a['address'] not in complete:
+            truncated[a['address']] = a['n_tx']
+    return truncated
+
+def batch_load_addrs(addrs):
+    """
+    looks up many uncached addresses with blockchain.com multiaddr queries of batch_size
+    and stores each fully returned address in the local file cache exactly as rawaddr would.
+    Addresses with too many transactions are left uncached to be paged by load_addr
+    """
+    
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    
+    addrs = [addr for addr in addrs if not os.path.exists(get_addr_cache(addr))]
+    if batch_size <= 1 or len(addrs) <= 1:
+        return
+    
+    # first pass learns n_tx for every address, but busy addresses crowd out the others
+    retry = dict()
+    for start in range(0, len(addrs), batch_size):
+        truncated = query_multiaddr(addrs[start:start+batch_size])
+        for addr, n_tx in truncated.items():
+            if n_tx <= 50:
+                retry[addr] = n_tx
+    
+    # second pass packs the truncated low activity addresses so each response is complete
+    batch = []
+    total = 0
+    for addr in sorted(retry.keys(), key=lambda a: retry[a]):
+        if len(batch) > 0 and (len(batch) >= batch_size or total + retry[addr] > multiaddr_max_tx):
+            query_multiaddr(batch)
+            batch = []
+            total = 0
+        batch.append(addr)
+        total += retry[addr]
+    if len(batch) > 1:
+        query_multiaddr(batch)
+
+def read_wallet_file(f):
+    """
+    Returns the wallet name, whether it is owned and a list of (addr, get_all_tx, get_any_tx)
+    for every address listed in the wallet file
+    """
+    
+    wallet, ignored = os.path.splitext(os.path.basename(f))
+    is_own = wallet[:1] != '@'
+    wallet_addrs = []
+    with open(f) as fh:
+        for addr in fh.readlines():
+            addr = addr.strip()
+            if len(addr) == 0:
+                continue
+            get_all_tx = True
+            get_any_tx = True
+            if addr[0] == '#':
+                # do not lookup any transactions
+                addr = addr[1:]
+                get_all_tx = False
+                get_any_tx = False
+            if not is_own:
+                # not own, do not exhastively lookup all transactions
+                get_all_tx = False
+            wallet_addrs.append((addr, get_all_tx, get_any_tx))
+    return wallet, is_own, wallet_addrs
+
+def prefetch_wallets(wallet_files, only_own = False):
+    """
+    collects every uncached address listed in the wallet files and batch loads them
+    """
+    
+    addrs = []
+    seen = dict()
+    for f in wallet_files:
+        wallet, is_own, wallet_addrs = read_wallet_file(f)
+        if only_own and not is_own:
+            continue
+        for addr, get_all_tx, get_any_tx in wallet_addrs:
+            if get_any_tx and addr not in seen:
+                seen[addr] = True
+                addrs.append(addr)
+    batch_load_addrs(addrs)
+
+def fetch_wallets(wallet_files):
+    """
+    downloads everything the wallet files need into the cache without building any graph
+    """
+    
+    reset_global_state()
+    download_all([])
+    prefetch_wallets(wallet_files)
+    for f in wallet_files:
+        wallet, is_own, wallet_addrs = read_wallet_file(f)
+        for addr, get_all_tx, get_any_tx in wallet_addrs:
+            load_addr(addr, wallet, get_all_tx, get_any_tx)
+
+def plan_wallets(wallet_files):
+    """
+    reports how many requests are still needed to fetch the wallet files and how long that will take.
+    Only the wallet files and the names of the cache files are read, no json is decoded
+    """
+    
+    cached = set(os.listdir(cache_dir)) if os.path.exists(cache_dir) else set()
+    index = read_cache_index()
+    seen = dict()
+    missing_pages = 0
+    uncached_addrs = 0
+    unindexed_addrs = 0
+    for f in wallet_files:
+        wallet, is_own, wallet_addrs = read_wallet_file(f)
+        for addr, get_all_tx, get_any_tx in wallet_addrs:
+            if addr in seen or not get_any_tx:
+                continue
+            seen[addr] = True
+            max_n_tx = 10000 if get_all_tx else 50
+            if os.path.basename(get_addr_cache(addr)) not in cached:
+                uncached_addrs += 1
+            elif addr not in index:
+                unindexed_addrs += 1
+            else:
+                for offset in range(50, min(index[addr], max_n_tx + 1), 50):
+                    if os.path.basename(get_addr_cache(addr, offset)) not in cached:
+                        missing_pages += 1
+    
+    eta = missing_pages * min_request_delay
+    print("Addresses:", len(seen), "cached:", len(seen) - uncached_addrs, "uncached:", uncached_addrs)
+    print("Missing pages of cached addresses:", missing_pages, "ETA %d:%02d:%02d" % (eta // 3600, eta % 3600 // 60, eta % 60),
+          "at one request every", min_request_delay, "seconds")
+    if unindexed_addrs > 0:
+        print("Addresses cached before the index existed, so their remaining pages are not counted:", unindexed_addrs)
+    
+    # the number of pages of an uncached address is unknown until its first response
+    requests = missing_pages
+    if batch_size > 1 and uncached_addrs > 1:
+        first_pass = math.ceil(uncached_addrs / batch_size)
+        requests += first_pass
+        print("Uncached addresses need at least", first_pass, "multiaddr requests,",
+              "then more to re-pack the addresses crowded out of a batch and every page of each address with more than 50 transactions, which are unknown until fetched")
+    elif uncached_addrs > 0:
+        requests += uncached_addrs
+        print("Uncached addresses need at least", uncached_addrs, "more requests,",
+              "then the further pages of each address with more than 50 transactions, which are unknown until fetched")
+    eta = requests * min_request_delay
+    print("At least", requests, "requests in total, ETA at least %d:%02d:%02d" % (eta // 3600, eta % 3600 // 60, eta % 60))
+    return requests
+
 def load_addr(addr, wallet = None, get_all_tx = True, get_any_tx = True):
     """
     looks up in local file cache or blockchain.com the transactions for address
     stores in cache if blockchain.com returned data
     """
     
-    global last_request_time
     if addr in addresses:            
         if verbose:
             print("Found ", addr, " in memory")
@@ -197,9 +625,7 @@ def load_addr(addr, wallet = None, get_all_tx = True, get_any_tx = True):
             break # blockchain won't respond to this excessively used addresses
 
         print(addr, "offset=", offset)
-        cache = cache_dir + "/%s.json" % (addr)
-        if offset > 0:
-            cache = cache_dir + "/%s-%d.json" % (addr,offset)
+        cache = get_addr_cache(addr, offset)
         if verbose:
             print ("Checking for cached addr:", addr , "at offset", offset, "in", cache)
     
@@ -207,19 +633,8 @@ def load_addr(addr, wallet = None, get_all_tx = True, get_any_tx = True):
             url = lookup_addr_url + addr
             if offset > 0:
                 url += "?&limit=50&offset=%d" % (offset)
-            wait_time = time.time() - last_request_time
-            if wait_time < min_request_delay:
-                wait_time = min_request_delay - wait_time
-                print("Waiting to make next URL API request: ", wait_time)
-                time.sleep(wait_time)
-            print("Downloading everything about ", addr, " from ", url)
-            
-            # raise an error if we need to re-download some data to avoid getting blocked by blockchain.com while debugging
-            if debug_mode:
-                raise "Where did addr=%s come from?" % (addr)
-            
-            urllib.request.urlretrieve(url, cache)
-            last_request_time = time.time()
+            print("Downloading everything about ", addr)
+            download_all([(url, cache)])
         with open(cache) as fh:
             tmp_addr_json = json.load(fh)
             if all_txs is None:
@@ -235,6 +650,13 @@ def load_addr(addr, wallet = None, get_all_tx = True, get_any_tx = True):
         offset += len(tmp_addr_json['txs'])
         if n_tx == 0:
             n_tx = addr_json['n_tx']
+            record_cache_index(addr, n_tx)
+            # queue every remaining page now so an interrupted download resumes where it stopped
+            pages = []
+            for page_offset in range(offset, min(n_tx, max_n_tx + 1), 50):
+                if not os.path.exists(get_addr_cache(addr, page_offset)):
+                    pages.append((lookup_addr_url + addr + "?&limit=50&offset=%d" % (page_offset), get_addr_cache(addr, page_offset)))
+            download_all(pages)
         if verbose:
             print("Found", addr, "with", n_tx, "transactions")
         if n_tx == 0:
@@ -272,7 +694,7 @@ def sanitize_addr(tx):
             if addr in rev_wallet:
                 orig_addr = addr
                 addr = rev_wallet[addr]
-                if addr[0] != '@':
+                if has_role(addr, ROLE_OWN):
                     from_self = True
                 if known_in is None:
                     known_in = addr
@@ -304,14 +726,14 @@ def sanitize_addr(tx):
         else:
             if addr in rev_wallet:
                 addr = rev_wallet[addr]
-                if addr[0] != '@':
+                if has_role(addr, ROLE_OWN):
                      to_self = True
                 known_out = addr
             else:
                 addr = addr[0:display_len]
                 unknown_out.append(orig_addr)
         outs2.append((addr, val))
-    if known_in is not None and (known_in[0] != '@' or suggest_thirdparty):
+    if known_in is not None and (has_role(known_in, ROLE_OWN) or suggest_thirdparty):
         if len(unknown_in) > 0 and (suggest_irrelevant or known_out is not None):
             print("Suggestion: append associated addresses to", known_in, ":", unknown_in)
         if len(outs) > 1 and len(unknown_out) == 1 and suggest_change and (suggest_irrelevant or known_out is not None):
@@ -326,19 +748,21 @@ def record_balances(inaddr, outaddr, xferval, ownIn = False, ownOut = False):
     
     if inaddr == outaddr or xferval == 0.0:
         return
-    if not unknown in inaddr:
+    from_untracked = has_role(inaddr, ROLE_UNTRACKED)
+    to_untracked = has_role(outaddr, ROLE_UNTRACKED)
+    if not from_untracked:
         balances[inaddr] -= xferval
         if ownIn:
             outputs[inaddr] += xferval
-            if not unknown in outaddr and not ownOut:
+            if not to_untracked and not ownOut:
                 # also track input from other
                 inputs[outaddr] += xferval
             
-    if not unknown in outaddr:
+    if not to_untracked:
         balances[outaddr] += xferval
         if ownOut:
             inputs[outaddr] += xferval
-            if not unknown in inaddr and not ownIn:
+            if not from_untracked and not ownIn:
                 # also track output from other
                 outputs[inaddr] += xferval
 
@@ -427,7 +851,9 @@ def add_tx_to_graph(G, txid):
                 # noop transaction do not add an edge, change ins or outs or balances
                 continue
 
-            if inaddr == unknown and outaddr == unknown:
+            from_untracked = has_role(inaddr, ROLE_UNTRACKED)
+            to_untracked = has_role(outaddr, ROLE_UNTRACKED)
+            if from_untracked and to_untracked:
                 # neither address is tracked
                 # do not add an edge or track balances
                 continue
@@ -436,8 +862,8 @@ def add_tx_to_graph(G, txid):
             record_balances(inaddr, outaddr, xferval, from_self, to_self)
      
                 
-            if unknown in inaddr:
-                if unknown in outaddr or outaddr[0] == '@':
+            if from_untracked:
+                if to_untracked or has_role(outaddr, ROLE_THIRDPARTY):
                     # unknown -> thirdparty destination
                     # do not add an edge
                     continue 
@@ -448,8 +874,8 @@ def add_tx_to_graph(G, txid):
                     known_in[inaddr] = 0
                 known_in[inaddr] -= xferval
                 
-            if unknown in outaddr:
-                if unknown in inaddr or inaddr[0] == '@':
+            if to_untracked:
+                if from_untracked or has_role(inaddr, ROLE_THIRDPARTY):
                     # unkown or thirdparty -> unknown destination
                     # do not add an edge
                     continue
@@ -485,19 +911,23 @@ def set_node_labels(G, n):
     """
     
     node = G.get_node(n)
-    is_own = str(n)[0] != '@'
+    is_own = has_role(n, ROLE_OWN)
     if True:
         node.attr['input'] = inputs[n]
         node.attr['output'] = outputs[n]
         node.attr['label'] = '%s' % (n)
+        if node.attr['folded']:
+            node.attr['label'] += "\nwallets=%s" % (node.attr['folded'])
+        if node.attr['internal']:
+            node.attr['label'] += "\ninternal=%0.3f" % (float(node.attr['internal']))
         if inputs[n] > 0.0:
             node.attr['label'] += "\nin=%0.3f" % (inputs[n])
         if outputs[n] > 0.0:
             node.attr['label'] += "\nout=%0.3f" % (outputs[n])
-        if is_own and unknown not in n:
+        if is_own:
             node.attr['label'] += "\nbal=%0.3f" % (balances[n])
 
-        if is_own and unknown not in n:
+        if is_own:
             # only color own wallets
             if balances[n] > 0 and balances[n] >= min_draw_val:
                 node.attr['color'] = 'green'
@@ -508,16 +938,16 @@ def set_node_labels(G, n):
     else:
         node.attr['color'] = 'blue'
 
-def set_edge_labels(G, e, own_nodes, not_own_nodes):
+def set_edge_labels(G, e):
     """
     apply pretty lables to an edge
     """
     
     f,t = e
-    from_own = True if f in own_nodes else False
-    from_third = True if f in not_own_nodes else False
-    to_own = True if t in own_nodes else False
-    to_third = True if t in not_own_nodes else False
+    from_own = has_role(f, ROLE_OWN)
+    from_third = has_role(f, ROLE_THIRDPARTY)
+    to_own = has_role(t, ROLE_OWN)
+    to_third = has_role(t, ROLE_THIRDPARTY)
         
     if from_third and to_third :
         # display this ThirdParty to Thirdparty edge as the value is not otherwise tracked
@@ -542,25 +972,177 @@ def set_edge_labels(G, e, own_nodes, not_own_nodes):
             e.attr['fontcolor'] = 'red'
         e.attr['color'] = 'red'
     
-""" TODO
-import argparser
-def parse_args():
-    argparser = argparse.ArgumentParser(add_help=False)
+
+def get_weight(e):
+    if e.attr['weight'] is None or e.attr['weight'] == '':
+        return 0.0
+    return float(e.attr['weight'])
+
+def get_traffic(G, n):
+    return sum([get_weight(e) for e in G.in_edges(n)]) + sum([get_weight(e) for e in G.out_edges(n)])
+
+def get_subgraphs_by_name(own_subgraph, thirdParty_subgraph):
+    """
+    Returns a dict of name => subgraph for the Own and ThirdParty subgraphs and all those within them
+    """
     
-    argparser.add_argument("wallets", metavar='N', type=str, nargs='+', help="List of wallet files (see below for naming scheme and how it affects display)")
-    argparser.add_argument("--min-draw", dest=min_draw_val, default=min_draw_val, type=int, help="Minimum sum of transactions to draw a link")
-    argparser.add_argument("--by-address", dest=by_wallet, default=True, const=False, type=bool, help="Nodes are by address, not grouped by wallet" )
-    argparser.add_argument("--verbose", dest=verbose, default=False, const=True, type=bool, help="Extra verbosity to print out transaction data while parsing")
-    argparser.add_argument("--debug", dest=debug_mode, default=False, const=True, type=bool, help="Additional debug information")
-    argparser.add_argument("--no-label-income", dest=label_income, default=True, const=False, type=bool, help="Do not label incoming transactions to own wallet")
-    argparser.add_argument("--no-label-outgoing", dest=label_expanse, default=True, const=False, type=bool, help="Do not label outgoing transactions from own wallet")
+    subgraphs = dict()
+    pending = [own_subgraph, thirdParty_subgraph]
+    while len(pending) > 0:
+        sg = pending.pop(0)
+        subgraphs[sg.get_name()] = sg
+        pending.extend(sg.subgraphs())
+    return subgraphs
+
+def get_other_node(G, sg, is_own):
+    """
+    Returns the name of the node that collects the folded wallets of a subgraph, adding it if needed
+    """
     
+    label = sg.graph_attr['label']
+    other = "Other" if label in (OWN, "ThirdParty") else "Other-" + label
+    if not is_own:
+        other = '@' + other
+    # a wallet file may already be named like this, e.g. Other.txt
+    while other in wallet_ids and not has_role(other, ROLE_FOLDED):
+        other += '+'
+    if not G.has_node(other):
+        sg.add_node(other)
+        set_balances(other)
+        G.get_node(other).attr['folded'] = "0"
+        register_wallet(other, ROLE_FOLDED | (ROLE_OWN if is_own else ROLE_THIRDPARTY), sg.get_name())
+    return other
 
-    options, unknown_options = argparser.parse_known_args()
-    if unknown_options is not None:
-        raise
-    return options
-"""
+def fold_node(G, n, other):
+    """
+    Moves all the edges and balances of node n onto node other and removes n from the graph.
+    The weight of the edges between n and other is kept on other as its internal traffic
+    """
+    
+    other_node = G.get_node(other)
+    internal = float(other_node.attr['internal'] or 0.0)
+    for e in G.out_edges(n):
+        f, t = e
+        if str(t) != other:
+            append_edge(G, other, str(t), get_weight(e), int(e.attr['count']))
+        else:
+            internal += get_weight(e)
+    for e in G.in_edges(n):
+        f, t = e
+        if str(f) != other:
+            append_edge(G, str(f), other, get_weight(e), int(e.attr['count']))
+        else:
+            internal += get_weight(e)
+    for totals in (balances, inputs, outputs):
+        if n in totals:
+            totals[other] += totals.pop(n)
+    node = G.get_node(n)
+    if has_role(n, ROLE_FOLDED):
+        # an "Other" node folded into the top level one
+        internal += float(node.attr['internal'] or 0.0)
+        folded = int(node.attr['folded'])
+    else:
+        folded = 1
+    if internal > 0.0:
+        other_node.attr['internal'] = internal
+    other_node.attr['folded'] = str(int(other_node.attr['folded']) + folded)
+    G.delete_node(n)
+    unregister_wallet(n)
+
+def summarize_graph(G, own_subgraph, thirdParty_subgraph):
+    """
+    Shrinks the graph according to max_edges_per_node, max_cluster_nodes, max_graph_nodes and max_graph_edges
+    by folding the light weight wallets into "Other" nodes of their subgraph.
+    Only wallets within the Own and ThirdParty subgraphs are folded, FEES and the untracked nodes are always kept
+    """
+    
+    subgraphs = get_subgraphs_by_name(own_subgraph, thirdParty_subgraph)
+    fixed = [FEES, OWN]
+    
+    def drawn_wallets():
+        return [n for n in wallet_names if get_wallet_subgraph(n) in subgraphs]
+    
+    def subgraph_of(n):
+        return subgraphs[get_wallet_subgraph(n)]
+    
+    def is_foldable(n):
+        return get_wallet_subgraph(n) in subgraphs and n not in fixed and not has_role(n, ROLE_FOLDED)
+    
+    def is_own_node(n):
+        return has_role(n, ROLE_OWN)
+    
+    def other_for(n, sg):
+        return get_other_node(G, sg, is_own_node(n))
+    
+    legend_nodes = len(G.get_subgraph("cluster_LEGEND").nodes())
+    legend_edges = len(G.get_subgraph("cluster_LEGEND").edges())
+    orig_nodes = G.number_of_nodes() - legend_nodes
+    orig_edges = G.number_of_edges() - legend_edges
+    
+    if max_edges_per_node is not None:
+        for n in drawn_wallets() + ["From " + unknown]:
+            if not G.has_node(n):
+                continue
+            out_edges = sorted(G.out_edges(n), key=get_weight, reverse=True)
+            for e in out_edges[max_edges_per_node:]:
+                f, t = e
+                t = str(t)
+                if not is_foldable(t):
+                    continue
+                weight = get_weight(e)
+                count = int(e.attr['count'])
+                other = other_for(t, subgraph_of(t))
+                G.delete_edge(f, t)
+                append_edge(G, n, other, weight, count)
+                # the value received moves along with the edge, as record_balances counted it
+                balances[t] -= weight
+                balances[other] += weight
+                if is_own_node(n) or is_own_node(t):
+                    inputs[t] -= weight
+                    inputs[other] += weight
+        # ThirdParty wallets left without any edges are only drawn as part of their "Other" node
+        for n in drawn_wallets():
+            if is_foldable(n) and not is_own_node(n) and G.degree(n) == 0:
+                fold_node(G, n, other_for(n, subgraph_of(n)))
+    
+    if max_cluster_nodes is not None:
+        for sg in thirdParty_subgraph.subgraphs():
+            members = [n for n in drawn_wallets() if get_wallet_subgraph(n) == sg.get_name() and is_foldable(n)]
+            if len(members) <= max_cluster_nodes:
+                continue
+            members.sort(key=lambda n: get_traffic(G, n), reverse=True)
+            # one slot of the budget is the "Other" node itself
+            for n in members[max(max_cluster_nodes - 1, 0):]:
+                fold_node(G, n, other_for(n, sg))
+    
+    if max_graph_nodes is not None:
+        # fold ThirdParty before Own wallets and the lightest first, first within their subgraph
+        # then into the top level "Other" nodes if there are too many subgraphs
+        for top_level in (False, True):
+            candidates = [n for n in drawn_wallets() if is_foldable(n) or (top_level and has_role(n, ROLE_FOLDED))]
+            candidates.sort(key=lambda n: (is_own_node(n), get_traffic(G, n)))
+            for n in candidates:
+                if G.number_of_nodes() - legend_nodes <= max_graph_nodes:
+                    break
+                sg = subgraph_of(n)
+                if top_level:
+                    sg = own_subgraph if is_own_node(n) else thirdParty_subgraph
+                other = other_for(n, sg)
+                if other != n:
+                    fold_node(G, n, other)
+    
+    if max_graph_edges is not None and G.number_of_edges() - legend_edges > max_graph_edges:
+        legend = G.get_subgraph("cluster_LEGEND")
+        edges = [e for e in G.edges() if not legend.has_edge(e[0], e[1])]
+        edges.sort(key=get_weight)
+        for e in edges[:len(edges) - max_graph_edges]:
+            G.delete_edge(e[0], e[1])
+    
+    print("Summarized graph from", orig_nodes, "nodes and", orig_edges, "edges to",
+          G.number_of_nodes() - legend_nodes, "nodes and", G.number_of_edges() - legend_edges, "edges")
+    if max_graph_nodes is not None and G.number_of_nodes() - legend_nodes > max_graph_nodes:
+        print("WARNING: the graph still has", G.number_of_nodes() - legend_nodes, "nodes, more than max_graph_nodes =", max_graph_nodes,
+              "because the fees, coinbase, untracked and top level Other nodes are never folded")
 
 def add_legend(G):
     G.add_subgraph(name="cluster_LEGEND", label="Legend", rank="sink")
@@ -584,7 +1166,11 @@ def add_legend(G):
 
   
 def process_wallets(output_file_name, wallet_files, collapse_own = False, only_own = False):
+    """
+    Builds the graph of all the wallet files and writes it to output_file_name, unless that is None
+    """
     
+    import pygraphviz as pgv
     reset_global_state()
     print("Preparing graph for:", output_file_name, "collapse_own:", collapse_own, "only_own:", only_own, "wallet_files:", wallet_files)
     
@@ -592,11 +1178,15 @@ def process_wallets(output_file_name, wallet_files, collapse_own = False, only_o
     newcoin_wallet = "@NewCoins"
     addresses[COINBASE] = None
     add_to_wallet(newcoin_wallet, COINBASE)
+    register_wallet(newcoin_wallet, ROLE_THIRDPARTY)
+    register_wallet(COINBASE, ROLE_THIRDPARTY)
     set_balances(newcoin_wallet)
     set_balances(COINBASE)
 
-    own_nodes = []
-    not_own_nodes = []
+    # finish any downloads left from an interrupted run, then
+    # fetch the uncached low activity addresses together before paging through each one
+    download_all([])
+    prefetch_wallets(wallet_files, only_own)
 
     G = pgv.AGraph(directed=True, landscape=False)
     
@@ -612,7 +1202,7 @@ def process_wallets(output_file_name, wallet_files, collapse_own = False, only_o
 
     own_subgraph.add_node(FEES)
     set_balances(FEES)
-    own_nodes.append(FEES)
+    register_wallet(FEES, ROLE_OWN, own_name)
 
     
     # Origin / Coinbase are in neither OWN nor ThirdParty
@@ -624,23 +1214,23 @@ def process_wallets(output_file_name, wallet_files, collapse_own = False, only_o
     # untracked are in neither OWN nor ThirdParty; they are unknown
     G.add_node("From " + unknown, wallet="Untracked")
     set_balances("From " + unknown)
+    register_wallet("From " + unknown, ROLE_UNTRACKED)
     from_unknown_node = G.get_node("From " + unknown)
     G.add_node("To " + unknown, wallet="Untracked")
     set_balances("To " + unknown)
+    register_wallet("To " + unknown, ROLE_UNTRACKED)
     to_unknown_node = G.get_node("To " + unknown)
     
     if collapse_own:
         own_subgraph.add_node(OWN)
         set_balances(OWN)
-        own_nodes.append(OWN)
+        register_wallet(OWN, ROLE_OWN, own_name)
         
     # load all the wallets and addresses contained in the wallet files
     for f in wallet_files:
         print("Inspecting file: ", f);
-        wallet = os.path.basename(f)
-        wallet, ignored = os.path.splitext(wallet)
-    
-        is_own = wallet[0] != '@'
+        wallet, is_own, wallet_addrs = read_wallet_file(f)
+        role = ROLE_OWN if is_own else ROLE_THIRDPARTY
         if only_own and not is_own:
             print("Skipping ThirdParty file", f)
             continue
@@ -676,41 +1266,19 @@ def process_wallets(output_file_name, wallet_files, collapse_own = False, only_o
             set_balances(wallet)
             
         if by_wallet:
-            if is_own:
-                if wallet not in own_nodes:
-                    own_nodes.append(wallet)
-            else:
-                if wallet not in not_own_nodes:
-                    not_own_nodes.append(wallet)
+            register_wallet(wallet, role, subgraph.get_name())
         
         wallet_addresses = []
         print("Opening f=", f, " wallet=", wallet)
-        with open(f) as fh:
-            for addr in fh.readlines():
-                addr = addr.strip();            
-                print(addr)
-                get_all_tx = True
-                get_any_tx = True
-                if addr[0] == '#':
-                    # do not lookup any transactions
-                    addr = addr[1:]
-                    get_all_tx = False
-                    get_any_tx = False
-                if not is_own:
-                    # not own, do not exhastively lookup all transactions
-                    get_all_tx = False
-                
-                txs = load_addr(addr, wallet, get_all_tx, get_any_tx)
-                if not by_wallet:
-                    subgraph.add_node(addr, wallet=wallet)
-                    set_balances(addr)
-
-                    if is_own:
-                        own_nodes.append(addr)
-                    else:
-                        not_own_nodes.append(addr)
-                else:
-                    wallet_addresses.append(addr)
+        for addr, get_all_tx, get_any_tx in wallet_addrs:
+            print(addr)
+            txs = load_addr(addr, wallet, get_all_tx, get_any_tx)
+            if not by_wallet:
+                subgraph.add_node(addr, wallet=wallet)
+                set_balances(addr)
+                register_wallet(addr, role, subgraph.get_name())
+            else:
+                wallet_addresses.append(addr)
         
         # save the addresses in the .dot file
         if save_addresses_in_dot and by_wallet and len(wallet_addresses) > 0:
@@ -724,10 +1292,13 @@ def process_wallets(output_file_name, wallet_files, collapse_own = False, only_o
     # apply all the recorded transactions to the graph
     for txid in transactions.keys():
         add_tx_to_graph(G, txid)
+    
+    if max_edges_per_node is not None or max_cluster_nodes is not None or max_graph_nodes is not None or max_graph_edges is not None:
+        summarize_graph(G, own_subgraph, thirdParty_subgraph)
  
     # add balance labels to fully tracked nodes
     for n in G.nodes():
-        if unknown in n:
+        if has_role(n, ROLE_UNTRACKED):
             continue
         if n in balances:
             print("Balance for", n, round(balances[n],3))
@@ -735,7 +1306,7 @@ def process_wallets(output_file_name, wallet_files, collapse_own = False, only_o
     
     # add edge labels
     for e in G.edges():
-        set_edge_labels(G, e, own_nodes, not_own_nodes)
+        set_edge_labels(G, e)
         
     if verbose:
         print("Graph:", G)
@@ -748,21 +1319,171 @@ def process_wallets(output_file_name, wallet_files, collapse_own = False, only_o
     set_node_labels(G,to_unknown_node)
     set_node_labels(G,from_unknown_node)
     
-    print("Writing full graph:", output_file_name)
-    G.write(output_file_name)
+    if output_file_name is not None:
+        print("Writing full graph:", output_file_name)
+        G.write(output_file_name)
     G.clear()
 
     
   
 
-if __name__ == "__main__":
-    args = sys.argv[1:]
-    if not by_wallet:
-        display_len = 50
-    
-    process_wallets("mywallet.dot", args)
+def build_graphs(wallet_files, output_prefix = "mywallet"):
+    process_wallets(output_prefix + ".dot", wallet_files)
     for i in suggest_additional_own_address:
         print("INFO: Suggest ADD ", i, " to wallet ", suggest_additional_own_address[i])
-    process_wallets("mywallet-own.dot", args, only_own = True)
-    process_wallets("mywallet-simplified.dot", args, collapse_own = True)
-    print('Finished')
+    process_wallets(output_prefix + "-own.dot", wallet_files, only_own = True)
+    process_wallets(output_prefix + "-simplified.dot", wallet_files, collapse_own = True)
+
+def render_dot_files(dot_files, output_format = "pdf", dpi = 600):
+    """
+    lays out each .dot file with graphviz dot, the same as: dot -Tpdf -Gdpi=600 -ofile.pdf file.dot
+    """
+    
+    import pygraphviz as pgv
+    for f in dot_files:
+        output_file_name = os.path.splitext(f)[0] + "." + output_format
+        print("Rendering", f, "to", output_file_name)
+        G = pgv.AGraph(f)
+        G.graph_attr['dpi'] = str(dpi)
+        G.draw(output_file_name, format=output_format, prog="dot")
+
+def query_wallets(wallet_files, names = None):
+    """
+    prints the tracked totals of every wallet file, or only the named wallets or addresses.
+    With by_wallet False the totals are of the addresses of the wallet files
+    """
+    
+    listed = dict()
+    for f in wallet_files:
+        listed[read_wallet_file(f)[0]] = True
+    
+    def is_listed(name):
+        if name not in balances:
+            return False
+        return name in listed if by_wallet else rev_wallet.get(name) in listed
+    
+    # the build log is only wanted with --verbose, and then on stderr
+    import contextlib
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(sys.stderr if verbose else devnull):
+            process_wallets(None, wallet_files)
+    wanted = None
+    if names is not None:
+        wanted = dict()
+        for name in names:
+            if name in rev_wallet and by_wallet:
+                print("Address", name, "is in wallet", rev_wallet[name])
+                name = rev_wallet[name]
+            if not is_listed(name):
+                print("WARNING: no wallet or address named", name)
+                continue
+            wanted[name] = True
+    for name in wallet_names:
+        if not is_listed(name):
+            continue
+        if wanted is not None and name not in wanted:
+            continue
+        line = "%s\tin=%0.8f\tout=%0.8f" % (name, inputs[name], outputs[name])
+        if has_role(name, ROLE_OWN):
+            line += "\tbal=%0.8f" % (balances[name])
+        print(line)
+
+def parse_date(date):
+    """
+    converts YYYY-MM-DD to days since the epoch, the units of max_date
+    """
+    
+    import calendar
+    return calendar.timegm(time.strptime(date, "%Y-%m-%d")) / 3600.0 / 24.0
+
+# options that directly set the global variable of the same name
+option_globals = ("verbose", "debug_mode", "cache_dir", "batch_size", "min_draw_val", "by_wallet", "max_date",
+                  "label_income", "label_expense", "max_edges_per_node", "max_cluster_nodes", "max_graph_nodes", "max_graph_edges")
+commands = ("fetch", "build", "render", "query")
+
+def parse_args(argv):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--verbose", dest="verbose", default=verbose, action="store_true", help="Extra verbosity to print out transaction data while parsing")
+    common.add_argument("--debug", dest="debug_mode", default=debug_mode, action="store_true", help="Raise an error instead of downloading anything")
+    common.add_argument("--cache-dir", dest="cache_dir", default=cache_dir, metavar="DIR", help="Directory of the cached blockchain.com responses (default: %(default)s)")
+    
+    wallets = argparse.ArgumentParser(add_help=False)
+    wallets.add_argument("wallets", metavar='WALLET', nargs='+', help="List of wallet files (see README for the naming scheme and how it affects display)")
+    
+    planning = argparse.ArgumentParser(add_help=False)
+    planning.add_argument("--plan", default=False, action="store_true", help="Only report how many requests are still needed and how long they will take")
+    
+    fetching = argparse.ArgumentParser(add_help=False)
+    fetching.add_argument("--batch-size", dest="batch_size", default=batch_size, type=int, metavar="N", help="Uncached addresses per multiaddr query (default: %(default)s)")
+    
+    graph = argparse.ArgumentParser(add_help=False)
+    graph.add_argument("--min-draw", dest="min_draw_val", default=min_draw_val, type=float, metavar="BTC", help="Minimum sum of transactions to draw a link (default: %(default)s)")
+    graph.add_argument("--by-address", dest="by_wallet", default=by_wallet, action="store_false", help="Nodes are by address, not grouped by wallet")
+    graph.add_argument("--max-date", dest="max_date", default=max_date, type=parse_date, metavar="DATE", help="Ignore transactions from this YYYY-MM-DD onwards")
+    graph.add_argument("--no-label-income", dest="label_income", default=label_income, action="store_false", help="Do not label incoming transactions to own wallet")
+    graph.add_argument("--no-label-outgoing", dest="label_expense", default=label_expense, action="store_false", help="Do not label outgoing transactions from own wallet")
+    graph.add_argument("--max-edges-per-node", dest="max_edges_per_node", default=max_edges_per_node, type=int, metavar="N", help="Keep only the N heaviest outgoing edges of each node, incoming edges are not limited")
+    graph.add_argument("--max-cluster-nodes", dest="max_cluster_nodes", default=max_cluster_nodes, type=int, metavar="N", help="Fold the lightest wallets of larger ThirdParty clusters")
+    graph.add_argument("--max-nodes", dest="max_graph_nodes", default=max_graph_nodes, type=int, metavar="N", help="Hard limit on the number of nodes drawn")
+    graph.add_argument("--max-edges", dest="max_graph_edges", default=max_graph_edges, type=int, metavar="N", help="Hard limit on the number of edges drawn")
+    
+    argparser = argparse.ArgumentParser(description="BWG - Bitcoin Wallet Graph")
+    subparsers = argparser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+    subparsers.add_parser("fetch", parents=[common, planning, fetching, wallets], help="Download the transactions of every address into the cache")
+    build = subparsers.add_parser("build", parents=[common, planning, fetching, graph, wallets], help="Write the full, own and simplified .dot graphs (the default command)")
+    build.add_argument("--output", default="mywallet", help="Prefix of the .dot files (default: %(default)s)")
+    render = subparsers.add_parser("render", parents=[common], help="Lay out .dot files with graphviz")
+    render.add_argument("dot_files", metavar='DOT', nargs='+', help="List of .dot files")
+    render.add_argument("--format", default="pdf", help="Output format (default: %(default)s)")
+    render.add_argument("--dpi", default=600, type=int, help="Output resolution (default: %(default)s)")
+    query = subparsers.add_parser("query", parents=[common, fetching, graph, wallets], help="Print the totals of the wallets, downloading anything not yet cached")
+    query.add_argument("--name", action="append", help="Only print this wallet, or the wallet containing this address. May be repeated")
+    
+    # the command goes first, and wallet files without one are built, as before there were commands
+    takes_value = set()
+    for subparser in (common, fetching, graph, build, render, query):
+        for action in subparser._actions:
+            if action.nargs != 0:
+                takes_value.update(action.option_strings)
+    skip_value = False
+    for i, arg in enumerate(argv):
+        if skip_value:
+            skip_value = False
+            continue
+        if arg.startswith('-'):
+            skip_value = arg in takes_value
+            continue
+        if arg in commands:
+            argv = [arg] + argv[:i] + argv[i+1:]
+        else:
+            argv = ["build"] + argv
+        break
+    return argparser.parse_args(argv)
+
+def apply_options(options):
+    global display_len
+    for name, value in vars(options).items():
+        if name in option_globals:
+            globals()[name] = value
+    if not by_wallet:
+        display_len = 50
+
+def main(argv):
+    options = parse_args(argv)
+    apply_options(options)
+    if options.command in ("fetch", "build") and options.plan:
+        plan_wallets(options.wallets)
+    elif options.command == "fetch":
+        fetch_wallets(options.wallets)
+    elif options.command == "build":
+        build_graphs(options.wallets, options.output)
+    elif options.command == "render":
+        render_dot_files(options.dot_files, options.format, options.dpi)
+    elif options.command == "query":
+        query_wallets(options.wallets, options.name)
+    if options.command != "query":
+        # query prints only the totals
+        print('Finished')
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,211 @@
+"""
+A local stand-in for the blockchain.com rawaddr and multiaddr API, serving the cached
+responses of the SatoshiThemselves example so the download code can be tested offline
+"""
+
+import http.server
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.parse
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+import parser as bwg
+
+example_dir = os.path.join(repo_dir, "example", "SatoshiThemselves")
+example_cache_dir = os.path.join(example_dir, "data", "addresses")
+
+# example addresses
+busy = "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa"    # 2198 transactions in 44 rawaddr pages, the newest crowd out everything else
+satoshi = "12cbQLTFMXRnSzktFkuoG3eHoMeFtpTu3S"  # 48 transactions, 1 rawaddr page
+hal = "1Q2TWHE3GMdB6BZKafqwxXtWAWgFt5Jvm3"      # 7 transactions, one of them from satoshi
+small = ["1DUDsfc23Dv9sPMEk5RsrtfzCw5ofi5sVW", "1ByLSV2gLRcuqUmfdYcpPQH8Npm8cccsFg"]
+
+def load_example_addr(addr):
+    """
+    Returns the rawaddr json of the first page and the transactions of every page of an example address
+    """
+
+    with open(os.path.join(example_cache_dir, addr + ".json")) as fh:
+        addr_json = json.load(fh)
+    txs = list(addr_json['txs'])
+    offset = len(txs)
+    while os.path.exists(os.path.join(example_cache_dir, "%s-%d.json" % (addr, offset))):
+        with open(os.path.join(example_cache_dir, "%s-%d.json" % (addr, offset))) as fh:
+            page = json.load(fh)['txs']
+        txs.extend(page)
+        offset += len(page)
+    return addr_json, txs
+
+class MockBlockchain:
+    """
+    Serves /rawaddr/ADDR and /multiaddr?active=A|B from the example cache.
+    failures maps a substring of the request path to a list of responses to give instead
+    of the real one, consumed in order: an http status code or "truncate"
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.failures = dict()
+        mock = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                mock.requests.append(self.path)
+                failure = mock.next_failure(self.path)
+                if isinstance(failure, int):
+                    self.send_response(failure)
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+                body = mock.respond(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                if failure == "truncate":
+                    body = body[:len(body) // 2]
+                self.send_response(200)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:%d/" % (self.server.server_address[1])
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def next_failure(self, path):
+        for pattern, responses in self.failures.items():
+            if pattern in path and len(responses) > 0:
+                return responses.pop(0)
+        return None
+
+    def respond(self, path):
+        url = urllib.parse.urlparse(path)
+        query = urllib.parse.parse_qs(url.query)
+        if url.path.startswith("/rawaddr/"):
+            offset = int(query.get("offset", ["0"])[0])
+            cache = os.path.join(example_cache_dir, os.path.basename(url.path) + ("-%d" % (offset) if offset > 0 else "") + ".json")
+            if not os.path.exists(cache):
+                return None
+            with open(cache, "rb") as fh:
+                return fh.read()
+        if url.path.startswith("/multiaddr"):
+            multi_json = {"addresses": [], "txs": []}
+            txs = dict()
+            for addr in query["active"][0].split("|"):
+                addr_json, addr_txs = load_example_addr(addr)
+                multi_json['addresses'].append(dict((key, addr_json[key]) for key in ('address', 'n_tx', 'total_received', 'total_sent', 'final_balance')))
+                for tx in addr_txs:
+                    txs[tx['hash']] = tx
+            n = int(query.get("n", ["50"])[0])
+            multi_json['txs'] = sorted(txs.values(), key=lambda tx: tx['time'], reverse=True)[:n]
+            return json.dumps(multi_json).encode()
+        return None
+
+class MockServerTestCase(unittest.TestCase):
+    """
+    Points parser.py at a fresh MockBlockchain and an empty temporary cache directory
+    """
+
+    patched = ("cache_dir", "lookup_addr_url", "lookup_multiaddr_url", "min_request_delay", "retry_delay", "max_retries", "debug_mode", "batch_size")
+
+    def setUp(self):
+        self.mock = MockBlockchain()
+        self.mock.start()
+        self.cache_dir = tempfile.mkdtemp()
+        self.saved = dict((name, getattr(bwg, name)) for name in self.patched)
+        bwg.cache_dir = self.cache_dir
+        bwg.lookup_addr_url = self.mock.url + "rawaddr/"
+        bwg.lookup_multiaddr_url = self.mock.url + "multiaddr?active="
+        bwg.min_request_delay = 0
+        bwg.retry_delay = 0.001
+        bwg.max_retries = 6
+        bwg.debug_mode = False
+        bwg.cache_index.clear()
+        bwg.reset_global_state()
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(bwg, name, value)
+        bwg.cache_index.clear()
+        bwg.reset_global_state()
+        self.mock.stop()
+        shutil.rmtree(self.cache_dir)
+
+    def cached(self):
+        return sorted(os.listdir(self.cache_dir))
+
+class ExampleGraphTestCase(unittest.TestCase):
+    """
+    Builds graphs of the example wallets from a copy of the example cache, without downloading
+    """
+
+    patched = ("cache_dir", "debug_mode", "by_wallet", "display_len",
+               "max_edges_per_node", "max_cluster_nodes", "max_graph_nodes", "max_graph_edges")
+
+    @classmethod
+    def setUpClass(cls):
+        cls.work_dir = tempfile.mkdtemp()
+        cls.cache_dir = os.path.join(cls.work_dir, "addresses")
+        shutil.copytree(example_cache_dir, cls.cache_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir)
+
+    def setUp(self):
+        self.saved = dict((name, getattr(bwg, name)) for name in self.patched)
+        bwg.cache_dir = self.cache_dir
+        bwg.debug_mode = True
+        bwg.cache_index.clear()
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(bwg, name, value)
+        bwg.cache_index.clear()
+        bwg.reset_global_state()
+
+    def wallet_files(self, renamed=None):
+        """
+        Returns copies of the example wallet files, renamed by the renamed dict
+        """
+
+        wallet_dir = tempfile.mkdtemp(dir=self.work_dir)
+        files = []
+        for name in sorted(f for f in os.listdir(example_dir) if f.endswith(".txt")):
+            files.append(os.path.join(wallet_dir, (renamed or dict()).get(name, name)))
+            shutil.copy(os.path.join(example_dir, name), files[-1])
+        return files
+
+    def build(self, wallet_files=None, **options):
+        """
+        Returns the graph written for the wallet files, without its legend, the options
+        not given keep their defaults
+        """
+
+        import pygraphviz
+        for name in self.patched[2:]:
+            setattr(bwg, name, options.get(name, self.saved[name]))
+        dot = os.path.join(self.work_dir, "graph.dot")
+        with contextlib.redirect_stdout(io.StringIO()):
+            bwg.process_wallets(dot, wallet_files or self.wallet_files())
+        G = pygraphviz.AGraph(dot)
+        G.delete_nodes_from(G.get_subgraph("cluster_LEGEND").nodes())
+        return G
@@ -0,0 +1,119 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import unittest
+import unittest.mock
+
+from mock_server import MockServerTestCase, bwg, busy, satoshi, hal, example_cache_dir
+
+
+class TestParseArgs(unittest.TestCase):
+
+    def test_wallet_files_default_to_build(self):
+        options = bwg.parse_args(["a.txt", "@b.txt"])
+        self.assertEqual(options.command, "build")
+        self.assertEqual(options.wallets, ["a.txt", "@b.txt"])
+
+    def test_options_before_wallet_files(self):
+        options = bwg.parse_args(["--verbose", "--plan", "--min-draw", "0.5", "a.txt"])
+        self.assertEqual(options.command, "build")
+        self.assertTrue(options.verbose)
+        self.assertTrue(options.plan)
+        self.assertEqual(options.min_draw_val, 0.5)
+        self.assertEqual(options.wallets, ["a.txt"])
+
+    def test_options_before_command(self):
+        options = bwg.parse_args(["--debug", "fetch", "a.txt"])
+        self.assertEqual(options.command, "fetch")
+        self.assertTrue(options.debug_mode)
+        self.assertEqual(options.wallets, ["a.txt"])
+
+    def test_option_values_before_command(self):
+        options = bwg.parse_args(["--cache-dir", "data/addresses", "fetch", "--plan", "a.txt"])
+        self.assertEqual(options.command, "fetch")
+        self.assertEqual(options.cache_dir, "data/addresses")
+        self.assertTrue(options.plan)
+        self.assertEqual(options.wallets, ["a.txt"])
+        options = bwg.parse_args(["--min-draw", "0.5", "query", "a.txt"])
+        self.assertEqual(options.command, "query")
+        self.assertEqual(options.min_draw_val, 0.5)
+        self.assertEqual(options.wallets, ["a.txt"])
+
+    def test_option_values_before_wallet_files(self):
+        options = bwg.parse_args(["--min-draw", "0.5", "a.txt"])
+        self.assertEqual(options.command, "build")
+        self.assertEqual(options.wallets, ["a.txt"])
+
+class TestPlan(MockServerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.wallet_dir = os.path.join(self.cache_dir, "wallets")
+        os.makedirs(self.wallet_dir)
+        self.wallet_files = []
+        for name, addrs in (("Satoshi", [busy, satoshi]), ("@Hal", [hal])):
+            self.wallet_files.append(os.path.join(self.wallet_dir, name + ".txt"))
+            with open(self.wallet_files[-1], "w") as fh:
+                fh.write("\n".join(addrs) + "\n")
+
+    def plan(self):
+        # planning only reads file names and the cache index
+        with unittest.mock.patch.object(json, "load", side_effect=AssertionError), unittest.mock.patch.object(json, "loads", side_effect=AssertionError):
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                requests = bwg.plan_wallets(self.wallet_files)
+        return requests, out.getvalue()
+
+    def test_cold_cache_is_a_lower_bound(self):
+        requests, out = self.plan()
+        self.assertEqual(requests, 1)
+        self.assertIn("uncached: 3", out)
+        self.assertIn("unknown until fetched", out)
+        self.assertIn("At least 1 requests in total", out)
+
+        # fetching makes at least as many requests as planned
+        with contextlib.redirect_stdout(io.StringIO()):
+            bwg.fetch_wallets(self.wallet_files)
+        self.assertGreaterEqual(len(self.mock.requests), requests)
+
+    def test_missing_pages_of_indexed_addresses(self):
+        for page in os.listdir(example_cache_dir):
+            if page.startswith(busy) and page != busy + "-100.json":
+                shutil.copy(os.path.join(example_cache_dir, page), self.cache_dir)
+        for addr in (satoshi, hal):
+            shutil.copy(os.path.join(example_cache_dir, addr + ".json"), self.cache_dir)
+        with open(os.path.join(self.cache_dir, bwg.cache_index_file), "w") as fh:
+            fh.write("%s 2198\n%s 48\n" % (busy, satoshi))
+        requests, out = self.plan()
+        self.assertEqual(requests, 1)
+        self.assertIn("Missing pages of cached addresses: 1 ", out)
+        self.assertIn("before the index existed, so their remaining pages are not counted: 1", out)
+
+class TestQuery(MockServerTestCase):
+
+    def test_query_prints_only_the_totals(self):
+        wallet_file = os.path.join(self.cache_dir, "Satoshi.txt")
+        with open(wallet_file, "w") as fh:
+            fh.write(satoshi + "\n")
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            bwg.query_wallets([wallet_file], [satoshi, "Nobody"])
+        self.assertEqual(out.getvalue().splitlines(), [
+            "Address %s is in wallet Satoshi" % (satoshi),
+            "WARNING: no wallet or address named Nobody",
+            "Satoshi\tin=50.43755933\tout=32.00000000\tbal=18.43755933"])
+
+    def test_query_lists_only_wallet_files(self):
+        wallet_files = []
+        for name, addr in (("Satoshi", satoshi), ("@Hal", hal)):
+            wallet_files.append(os.path.join(self.cache_dir, name + ".txt"))
+            with open(wallet_files[-1], "w") as fh:
+                fh.write(addr + "\n")
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            bwg.main(["query", "--batch-size", "2"] + wallet_files)
+        self.assertEqual([line.split("\t")[0] for line in out.getvalue().splitlines()], ["Satoshi", "@Hal"])
+        # both addresses were fetched by a single multiaddr request
+        self.assertEqual(len(self.mock.requests), 1)
+
+if __name__ == "__main__":
+    unittest.main()
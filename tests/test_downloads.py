@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import unittest
+import unittest.mock
+import urllib.error
+
+from mock_server import MockServerTestCase, bwg, busy, satoshi, example_cache_dir, repo_dir
+
+
+class TestFetchUrl(MockServerTestCase):
+
+    def fetch(self, addr):
+        cache = bwg.get_addr_cache(addr)
+        asyncio.run(bwg.fetch_url(bwg.lookup_addr_url + addr, cache))
+        return cache
+
+    def test_retries_rate_limit_server_errors_and_truncation(self):
+        self.mock.failures[satoshi] = [429, 503, "truncate"]
+        cache = self.fetch(satoshi)
+        self.assertEqual(len(self.mock.requests), 4)
+        with open(cache) as fh, open(os.path.join(example_cache_dir, satoshi + ".json")) as expected:
+            self.assertEqual(json.load(fh), json.load(expected))
+        self.assertEqual(self.cached(), [satoshi + ".json"])
+
+    def test_client_errors_are_not_retried(self):
+        self.mock.failures[satoshi] = [404]
+        with self.assertRaises(urllib.error.HTTPError):
+            self.fetch(satoshi)
+        self.assertEqual(len(self.mock.requests), 1)
+        self.assertEqual(self.cached(), [])
+
+    def test_truncated_downloads_are_never_cached(self):
+        bwg.max_retries = 2
+        self.mock.failures[satoshi] = ["truncate"] * 3
+        with self.assertRaises(RuntimeError):
+            self.fetch(satoshi)
+        self.assertEqual(len(self.mock.requests), 3)
+        self.assertEqual(self.cached(), [])
+
+class TestWriteAtomic(MockServerTestCase):
+
+    def test_interrupted_write_keeps_previous_file(self):
+        path = os.path.join(self.cache_dir, "addr.json")
+        bwg.write_atomic(path, b'{"n_tx": 1}')
+        # interrupted after writing the data but before the rename
+        with unittest.mock.patch.object(bwg.os, "replace", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                bwg.write_atomic(path, b'{"n_tx": 2, "txs": [')
+        with open(path) as fh:
+            self.assertEqual(json.load(fh), {"n_tx": 1})
+
+    def test_interrupted_first_write_leaves_no_file(self):
+        path = os.path.join(self.cache_dir, "addr.json")
+        with unittest.mock.patch.object(bwg.os, "replace", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                bwg.write_atomic(path, b'{"n_tx": 2, "txs": [')
+        self.assertFalse(os.path.exists(path))
+
+class TestResume(MockServerTestCase):
+
+    def interrupt(self):
+        bwg.max_retries = 1
+        self.mock.failures["offset=300"] = [503, 503]
+        with self.assertRaises(RuntimeError):
+            bwg.load_addr(busy, "FirstBlock")
+        with open(os.path.join(self.cache_dir, bwg.work_queue_file)) as fh:
+            return json.load(fh)
+
+    def test_interrupted_paging_resumes_from_pending_queue(self):
+        pending = self.interrupt()
+        first_run = list(self.mock.requests)
+        self.assertEqual(len(first_run), 8)
+        self.assertEqual(len(pending), 38)
+        self.assertTrue(pending[0][0].endswith("offset=300"))
+        # the cache files are kept relative to cache_dir
+        self.assertEqual(pending[0][1], busy + "-300.json")
+
+        # a new run drains the queue before anything else
+        bwg.reset_global_state()
+        self.mock.requests.clear()
+        bwg.download_all([])
+        txs = bwg.load_addr(busy, "FirstBlock")
+        second_run = list(self.mock.requests)
+        self.assertEqual(len(second_run), 38)
+        self.assertTrue(second_run[0].endswith("offset=300"))
+        self.assertEqual(len(set(first_run[:-2]) & set(second_run)), 0)
+        self.assertEqual(len(txs), 2198)
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, bwg.work_queue_file)))
+        self.assertEqual([f for f in self.cached() if f.endswith(".tmp")], [])
+
+    def test_pending_queue_survives_a_different_cache_dir_path(self):
+        cwd = os.getcwd()
+        self.addCleanup(os.chdir, cwd)
+        os.chdir(os.path.dirname(self.cache_dir))
+        bwg.cache_dir = os.path.basename(self.cache_dir)
+        self.interrupt()
+
+        # resumed from another directory with the cache given as an absolute path
+        os.chdir(repo_dir)
+        bwg.cache_dir = self.cache_dir
+        bwg.reset_global_state()
+        self.mock.requests.clear()
+        bwg.download_all([])
+        self.assertEqual(len(self.mock.requests), 38)
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, bwg.work_queue_file)))
+        self.assertEqual(len([f for f in self.cached() if f.startswith(busy)]), 44)
+
+    def test_client_error_does_not_block_the_queue(self):
+        self.mock.failures["offset=300"] = [404]
+        with self.assertRaises(urllib.error.HTTPError):
+            bwg.load_addr(busy, "FirstBlock")
+        with open(os.path.join(self.cache_dir, bwg.work_queue_file)) as fh:
+            pending = json.load(fh)
+        self.assertEqual(len(pending), 37)
+        self.assertTrue(pending[0][0].endswith("offset=350"))
+
+        # the next run downloads the rest of the queue without the refused page
+        bwg.reset_global_state()
+        self.mock.failures["offset=300"] = [404]
+        self.mock.requests.clear()
+        bwg.download_all([])
+        self.assertEqual(len(self.mock.requests), 37)
+        self.assertNotIn(busy + "-300.json", self.cached())
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, bwg.work_queue_file)))
+
+class TestCacheIndex(MockServerTestCase):
+
+    def test_torn_line_is_skipped(self):
+        with open(os.path.join(self.cache_dir, bwg.cache_index_file), "w") as fh:
+            fh.write("%s 48\n%s 21" % (satoshi, busy))
+        self.assertEqual(bwg.read_cache_index(), {satoshi: 48})
+        bwg.record_cache_index(busy, 2198)
+        bwg.cache_index.clear()
+        self.assertEqual(bwg.read_cache_index(), {satoshi: 48, busy: 2198})
+
+if __name__ == "__main__":
+    unittest.main()
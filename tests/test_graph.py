@@ -0,0 +1,41 @@
+import collections
+import unittest
+
+from mock_server import ExampleGraphTestCase, bwg
+
+
+class TestByAddress(ExampleGraphTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.by_wallet = self.build()
+        self.by_address = self.build(by_wallet=False, display_len=50)
+
+    def wallet_of(self, n):
+        if bwg.has_role(n, bwg.ROLE_UNTRACKED):
+            return str(n)
+        return self.by_address.get_node(n).attr['wallet'] or str(n)
+
+    def test_edges_add_up_to_the_wallet_edges(self):
+        edges = collections.defaultdict(float)
+        for e in self.by_address.edges():
+            f, t = self.wallet_of(e[0]), self.wallet_of(e[1])
+            if f != t:
+                edges[(f, t)] += bwg.get_weight(e)
+        wallet_edges = dict(((str(e[0]), str(e[1])), bwg.get_weight(e)) for e in self.by_wallet.edges())
+        self.assertEqual(sorted(edges.keys()), sorted(wallet_edges.keys()))
+        for e, weight in wallet_edges.items():
+            self.assertAlmostEqual(edges[e], weight, places=8, msg=e)
+        # ThirdParty addresses have no edges to or from the untracked nodes, just like their wallets
+        self.assertNotIn(("@SubsequentTransactions", "To " + bwg.unknown), edges)
+
+    def test_only_own_addresses_have_balances(self):
+        for n in self.by_address.nodes():
+            node = self.by_address.get_node(n)
+            wallet = self.by_wallet.get_node(self.wallet_of(n))
+            self.assertEqual("\nbal=" in node.attr['label'], "\nbal=" in wallet.attr['label'], n)
+            self.assertEqual(bool(node.attr['color']), bool(wallet.attr['color']), n)
+        self.assertEqual(self.by_address.get_node(bwg.COINBASE).attr['label'], bwg.COINBASE)
+
+if __name__ == "__main__":
+    unittest.main()
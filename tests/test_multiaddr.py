@@ -0,0 +1,59 @@
+import json
+import os
+import unittest
+
+from mock_server import MockServerTestCase, bwg, busy, satoshi, hal, small, load_example_addr
+
+
+class TestMultiaddr(MockServerTestCase):
+
+    def multiaddr_requests(self):
+        return [path for path in self.mock.requests if path.startswith("/multiaddr")]
+
+    def test_crowded_batch_is_repacked(self):
+        batch = [busy, satoshi, hal] + small
+        truncated = bwg.query_multiaddr(batch)
+        self.assertEqual(sorted(truncated.keys()), sorted(batch))
+        self.assertEqual(self.cached(), [])
+
+        bwg.batch_load_addrs(batch)
+        requests = self.multiaddr_requests()
+        self.assertEqual(len(requests), 3)
+        self.assertNotIn(busy, requests[2])
+        for addr in [satoshi, hal] + small:
+            self.assertTrue(os.path.exists(bwg.get_addr_cache(addr)), addr)
+        # busy addresses are left for load_addr to page through rawaddr
+        self.assertFalse(os.path.exists(bwg.get_addr_cache(busy)))
+        # responses are split in memory, nothing but the address caches is written
+        self.assertEqual([f for f in self.cached() if not f.endswith(".json") and f != bwg.cache_index_file], [])
+
+    def test_shared_transaction_goes_to_both_addresses(self):
+        bwg.batch_load_addrs([satoshi, hal])
+        self.assertEqual(len(self.multiaddr_requests()), 1)
+        with open(bwg.get_addr_cache(satoshi)) as fh:
+            satoshi_txs = dict((tx['hash'], tx) for tx in json.load(fh)['txs'])
+        with open(bwg.get_addr_cache(hal)) as fh:
+            hal_txs = dict((tx['hash'], tx) for tx in json.load(fh)['txs'])
+        shared = set(satoshi_txs.keys()) & set(hal_txs.keys())
+        self.assertEqual(len(shared), 1)
+        self.assertEqual(len(satoshi_txs), 48)
+        self.assertEqual(len(hal_txs), 7)
+
+    def test_cache_matches_rawaddr_layout(self):
+        bwg.batch_load_addrs([satoshi] + small)
+        rawaddr_json, rawaddr_txs = load_example_addr(satoshi)
+        with open(bwg.get_addr_cache(satoshi)) as fh:
+            batched_json = json.load(fh)
+        # multiaddr does not report hash160, nothing reads it
+        self.assertEqual(sorted(batched_json.keys()), sorted(key for key in rawaddr_json.keys() if key != 'hash160'))
+        for key in ('address', 'n_tx', 'total_received', 'total_sent', 'final_balance'):
+            self.assertEqual(batched_json[key], rawaddr_json[key])
+        self.assertEqual([tx['hash'] for tx in batched_json['txs']], [tx['hash'] for tx in rawaddr_txs])
+
+        # load_addr reads the batched cache without any rawaddr request
+        txs = bwg.load_addr(satoshi, "FirstTransacted")
+        self.assertEqual(len(txs), 48)
+        self.assertEqual([path for path in self.mock.requests if path.startswith("/rawaddr")], [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+
+from mock_server import ExampleGraphTestCase, bwg
+
+# the example wallets renamed into clusters
+clustered = {
+    "FirstBlock.txt": "FirstBlock-Mining.txt",
+    "SecondBlock.txt": "SecondBlock-Mining.txt",
+    "NextBlocks.txt": "NextBlocks-Mining.txt",
+    "@FirstTransaction.txt": "@FirstTransaction-Friends.txt",
+    "@SecondTransaction.txt": "@SecondTransaction-Friends.txt",
+    "@SubsequentTransactions.txt": "@SubsequentTransactions-Exchange.txt",
+}
+
+class SummarizeTestCase(ExampleGraphTestCase):
+
+    def build(self, wallet_files=None, **options):
+        """
+        Returns the graph of the clustered example and the sum of the balances of its own nodes
+        """
+
+        G = super().build(wallet_files or self.wallet_files(clustered), **options)
+        own_balance = sum(bwg.balances[n] for n in G.nodes() if bwg.has_role(n, bwg.ROLE_OWN))
+        return G, own_balance
+
+class TestSummarize(SummarizeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.full, self.full_balance = self.build()
+
+    def assertFolded(self, G, own_balance):
+        self.assertAlmostEqual(own_balance, self.full_balance, places=8)
+        folded = 0
+        for n in G.nodes():
+            if bwg.has_role(n, bwg.ROLE_FOLDED):
+                wallets = int(n.attr['folded'])
+                if wallets > 0:
+                    self.assertIn("\nwallets=%d\n" % (wallets), n.attr['label'] + "\n")
+                folded += wallets
+            else:
+                self.assertTrue(self.full.has_node(n), n)
+        # every wallet is either drawn or counted in exactly one "Other" node
+        drawn = len([n for n in G.nodes() if not bwg.has_role(n, bwg.ROLE_FOLDED)])
+        self.assertEqual(drawn + folded, self.full.number_of_nodes())
+
+    def test_full_graph(self):
+        self.assertEqual(self.full.number_of_nodes(), 11)
+        self.assertEqual(self.full.number_of_edges(), 12)
+        self.assertEqual([n for n in self.full.nodes() if bwg.has_role(n, bwg.ROLE_FOLDED)], [])
+
+    def test_max_edges_per_node(self):
+        G, own_balance = self.build(max_edges_per_node=1)
+        self.assertFolded(G, own_balance)
+        for n in G.nodes():
+            if bwg.get_wallet_subgraph(n) is None:
+                # the coinbase is outside of the Own and ThirdParty subgraphs
+                continue
+            # edges to the fees, untracked and "Other" nodes are never moved
+            kept = [t for f, t in G.out_edges(n) if bwg.has_role(t, bwg.ROLE_OWN | bwg.ROLE_THIRDPARTY) and not bwg.has_role(t, bwg.ROLE_FOLDED) and t != bwg.FEES]
+            self.assertLessEqual(len(kept), 1, n)
+        # the value of the rerouted edges is received by the "Other" nodes
+        for n in G.nodes():
+            if bwg.has_role(n, bwg.ROLE_FOLDED) and len(G.in_edges(n)) > 0:
+                self.assertIn("\nin=", n.attr['label'])
+
+    def test_max_cluster_nodes(self):
+        G, own_balance = self.build(max_cluster_nodes=1)
+        self.assertFolded(G, own_balance)
+        self.assertFalse(G.has_node("@FirstTransaction-Friends"))
+        self.assertFalse(G.has_node("@SecondTransaction-Friends"))
+        self.assertTrue(G.get_node("@Other-Friends").attr['label'].startswith("@Other-Friends\nwallets=2\n"))
+
+    def test_max_graph_nodes(self):
+        G, own_balance = self.build(max_graph_nodes=8)
+        self.assertFolded(G, own_balance)
+        self.assertEqual(G.number_of_nodes(), 8)
+
+    def test_max_graph_nodes_below_the_floor(self):
+        G, own_balance = self.build(max_graph_nodes=1)
+        self.assertFolded(G, own_balance)
+        self.assertEqual(sorted(n for n in G.nodes() if bwg.has_role(n, bwg.ROLE_FOLDED)), ["@Other", "Other"])
+
+    def test_max_graph_edges(self):
+        G, own_balance = self.build(max_graph_edges=5)
+        self.assertEqual(G.number_of_nodes(), self.full.number_of_nodes())
+        self.assertEqual(G.number_of_edges(), 5)
+        self.assertAlmostEqual(own_balance, self.full_balance, places=8)
+
+class TestOtherNames(SummarizeTestCase):
+
+    def test_wallets_named_other_are_not_reused(self):
+        renamed = dict(clustered)
+        renamed["FirstTransacted.txt"] = "Other.txt"
+        renamed["@SubsequentTransactions.txt"] = "@Other-Exchange.txt"
+        full, full_balance = self.build(self.wallet_files(renamed))
+        G, own_balance = self.build(self.wallet_files(renamed), max_cluster_nodes=1, max_graph_nodes=1)
+        self.assertAlmostEqual(own_balance, full_balance, places=8)
+        for n in ("Other", "@Other-Exchange"):
+            self.assertFalse(bwg.has_role(n, bwg.ROLE_FOLDED), n)
+        self.assertTrue(bwg.has_role("Other+", bwg.ROLE_FOLDED))
+        self.assertTrue(bwg.has_role("@Other+", bwg.ROLE_FOLDED) or bwg.has_role("@Other", bwg.ROLE_FOLDED))
+
+if __name__ == "__main__":
+    unittest.main()